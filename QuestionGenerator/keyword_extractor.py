@@ -1,17 +1,39 @@
 import numpy as np
-from typing import List, Dict, Set
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import os
+import sqlite3
+from typing import List, Dict, Iterable, Iterator, Optional
 from collections import Counter
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 import spacy
+from spacy.tokens import Doc
 import ollama
 from sklearn.feature_extraction.text import TfidfVectorizer
-import re
+import string
+import unicodedata
+
+from utils.lru_cache import LRUCache
 
 
 class KeywordExtractor:
-    def __init__(self, embedding_model: str = "nomic-embed-text"):
+    # Characters allowed in a keyword: latin letters, Latin-1 accented letters,
+    # whitespace (str.isspace, the same set as the regex \s) and hyphens.
+    # Translating with this table deletes them, so a valid keyword maps to ''.
+    _STRIP_ALLOWED = str.maketrans('', '', string.ascii_letters
+                                   + ''.join(map(chr, range(0xC0, 0x100)))
+                                   + ''.join(c for c in map(chr, range(0x3001)) if c.isspace())
+                                   + '-')
+
+    def __init__(self, embedding_model: str = "nomic-embed-text", embed_batch_size: int = 32,
+                 cache_path: str = "../data/embed_cache.db", max_cache_entries: int = 5000):
         """Initialize the keyword extractor with specified embedding model."""
+        if not isinstance(embed_batch_size, int) or embed_batch_size < 1:
+            raise ValueError(f"embed_batch_size must be a positive integer, got {embed_batch_size!r}")
+
         self.embedding_model = embedding_model
+        # Number of texts sent per /api/embed request
+        self.embed_batch_size = embed_batch_size
         # Load French language model for spaCy
         try:
             self.nlp = spacy.load('fr_core_news_md')
@@ -20,29 +42,132 @@ class KeywordExtractor:
             spacy.cli.download('fr_core_news_md')
             self.nlp = spacy.load('fr_core_news_md')
 
-        # Keep a cache of embeddings to avoid recomputing
-        self.embedding_cache: Dict[str, np.ndarray] = {}
-        # Keep a cache of aligned keywords
-        self.keyword_alignment_cache: Dict[str, str] = {}
+        # Keep a bounded cache of embeddings to avoid recomputing
+        self.embedding_cache: LRUCache[str, np.ndarray] = LRUCache(max_cache_entries)
+        # Keep a bounded cache of aligned keywords
+        self.keyword_alignment_cache: LRUCache[str, str] = LRUCache(max_cache_entries)
+
+        # Persist embeddings across runs, keyed by (model, sha256(text))
+        self.cache_path = cache_path
+        self.init_cache_database()
+
+    def init_cache_database(self):
+        """Initialize the persistent embedding cache."""
+        with sqlite3.connect(self.cache_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    hash BLOB NOT NULL,
+                    vec BLOB NOT NULL,
+                    PRIMARY KEY (model, hash)
+                )
+            ''')
+            conn.commit()
+
+    @staticmethod
+    def _text_hash(text: str) -> bytes:
+        """Hash a text for use as a persistent cache key."""
+        return hashlib.sha256(text.encode('utf-8')).digest()
+
+    def _load_stored_embeddings(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Load embeddings already persisted for this model."""
+        hashes = {self._text_hash(t): t for t in texts}
+        stored = {}
+        with sqlite3.connect(self.cache_path) as conn:
+            cursor = conn.cursor()
+            keys = list(hashes)
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                cursor.execute(
+                        f'SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({",".join("?" * len(chunk))})',
+                        [self.embedding_model, *chunk]
+                        )
+                for text_hash, vec in cursor.fetchall():
+                    stored[hashes[text_hash]] = np.frombuffer(vec, dtype = np.float32)
+        return stored
+
+    def _store_embeddings(self, embeddings: Dict[str, np.ndarray]):
+        """Persist newly computed embeddings as float32 blobs."""
+        with sqlite3.connect(self.cache_path) as conn:
+            conn.executemany(
+                    'INSERT OR IGNORE INTO embeddings (model, hash, vec) VALUES (?, ?, ?)',
+                    [(self.embedding_model, self._text_hash(t), e.tobytes())
+                     for t, e in embeddings.items()]
+                    )
+            conn.commit()
 
     def get_embedding(self, text: str) -> np.ndarray:
         """Get embedding for a piece of text using ollama."""
-        if text in self.embedding_cache:
-            return self.embedding_cache[text]
+        return self.get_embeddings_batch([text])[0]
 
-        response = ollama.embeddings(
-                model = self.embedding_model,
-                prompt = text
-                )
-        embedding = np.array(response['embedding'])
-        self.embedding_cache[text] = embedding
-        return embedding
+    def get_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        """Get embeddings for several texts, sending uncached ones to ollama in batches."""
+        embeddings = {t: self.embedding_cache[t] for t in texts if t in self.embedding_cache}
+        missing = list(dict.fromkeys(t for t in texts if t not in embeddings))
+        if not missing:
+            return np.array([embeddings[t] for t in texts], dtype = np.float32)
+
+        # Fall back to the persistent cache before asking ollama
+        for t, embedding in self._load_stored_embeddings(missing).items():
+            self.embedding_cache[t] = embedding
+            embeddings[t] = embedding
+
+        uncached = [t for t in missing if t not in embeddings]
+        computed = {}
+        for start in range(0, len(uncached), self.embed_batch_size):
+            batch = uncached[start:start + self.embed_batch_size]
+            response = ollama.embed(
+                    model = self.embedding_model,
+                    input = batch
+                    )
+            for t, vector in zip(batch, response['embeddings']):
+                # Store float32 unit vectors so cosine similarity is a plain dot product
+                embedding = np.asarray(vector, dtype = np.float32)
+                embedding /= np.linalg.norm(embedding) + 1e-12
+                self.embedding_cache[t] = embedding
+                embeddings[t] = embedding
+                computed[t] = embedding
+
+        if computed:
+            self._store_embeddings(computed)
 
-    def extract_keywords(self, text: str, num_keywords: int = 3) -> List[str]:
-        """Extract keywords from text using a combination of methods."""
-        # Clean and preprocess text
-        doc = self.nlp(text)
+        return np.array([embeddings[t] for t in texts], dtype = np.float32)
 
+    def parse_documents(self, texts: Iterable, batch_size: int = 64,
+                        n_process: int = min(4, os.cpu_count() or 1),
+                        as_tuples: bool = False) -> Iterator:
+        """Parse several texts with spaCy in batches, yielding one Doc per text in order.
+
+        With as_tuples, texts yields (text, context) pairs and (Doc, context) pairs are returned.
+        """
+        # The lemmatizer is unused; the parser is kept for noun chunks
+        return self.nlp.pipe(texts, batch_size = batch_size, n_process = n_process,
+                             as_tuples = as_tuples, disable = ['lemmatizer'])
+
+    @staticmethod
+    def _fold(keyword: str) -> str:
+        """Lowercase a keyword and strip its diacritics."""
+        decomposed = unicodedata.normalize('NFKD', keyword)
+        return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+    def extract_keywords(self, text: str, num_keywords: int = 3,
+                         tfidf: Optional[TfidfVectorizer] = None,
+                         tfidf_terms: Optional[np.ndarray] = None) -> List[str]:
+        """Extract keywords from text using a combination of methods.
+
+        tfidf is a vectorizer already fitted on the whole corpus; without one,
+        a vectorizer is fitted on this text alone. tfidf_terms is its
+        get_feature_names_out(), which callers reusing tfidf across many
+        texts should compute once, as building it sorts the whole vocabulary.
+        """
+        return self.extract_keywords_from_doc(self.nlp(text), text, num_keywords, tfidf, tfidf_terms)
+
+    def extract_keywords_from_doc(self, doc: Doc, text: str, num_keywords: int = 3,
+                                  tfidf: Optional[TfidfVectorizer] = None,
+                                  tfidf_terms: Optional[np.ndarray] = None) -> List[str]:
+        """Extract keywords from text already parsed by spaCy."""
         # Extract candidates using multiple methods
         candidates = set()
 
@@ -61,32 +186,46 @@ class KeywordExtractor:
                 candidates.add(token.text.lower())
 
         # Method 4: TF-IDF for single words
-        tfidf = TfidfVectorizer(max_features = 10)
-        try:
-            tfidf_matrix = tfidf.fit_transform([text])
-            word_scores = dict(zip(tfidf.get_feature_names_out(), tfidf_matrix.toarray()[0]))
-            candidates.update(word_scores.keys())
-        except:
-            pass
+        if tfidf is None:
+            tfidf = TfidfVectorizer(max_features = 10)
+            try:
+                tfidf.fit([text])
+                tfidf_terms = tfidf.get_feature_names_out()
+            except ValueError:
+                # Empty vocabulary, e.g. a text made only of stop words
+                tfidf = None
+        elif tfidf_terms is None:
+            tfidf_terms = tfidf.get_feature_names_out()
+
+        if tfidf is not None:
+            row = tfidf.transform([text])
+            top_terms = row.indices[np.argsort(-row.data)[:10]]
+            candidates.update(tfidf_terms[top_terms])
 
         # Filter out very short keywords and those with special characters
         candidates = {k for k in candidates
-                      if len(k) > 2 and re.match(r'^[a-zA-ZÀ-ÿ\s-]+$', k)}
+                      if len(k) > 2 and not k.translate(self._STRIP_ALLOWED)}
+
+        # Merge candidates that only differ by case or diacritics
+        deduplicated: Dict[str, str] = {}
+        for k in sorted(candidates):
+            deduplicated.setdefault(self._fold(k), k)
+        candidate_list = list(deduplicated.values())
 
-        # Get embeddings for all candidates
-        candidate_embeddings = {k: self.get_embedding(k) for k in candidates}
+        # Nothing to rank when every candidate would be kept anyway
+        if len(candidate_list) <= num_keywords:
+            return candidate_list
 
-        # Get embedding for the full text
-        text_embedding = self.get_embedding(text)
+        # Get embeddings for all candidates and the full text in one batch
+        embeddings = self.get_embeddings_batch(candidate_list + [text])
 
         # Score candidates based on similarity to full text
-        scores = {k: cosine_similarity(v.reshape(1, -1),
-                                       text_embedding.reshape(1, -1))[0][0]
-                  for k, v in candidate_embeddings.items()}
+        scores = embeddings[:-1] @ embeddings[-1]
 
-        # Sort by score and take top keywords
-        top_keywords = sorted(scores.items(), key = lambda x: x[1], reverse = True)
-        return [k for k, _ in top_keywords[:num_keywords]]
+        # Partially select the top keywords, then sort only those by score
+        top_indices = np.argpartition(-scores, num_keywords)[:num_keywords]
+        top_indices = top_indices[np.argsort(-scores[top_indices])]
+        return [candidate_list[i] for i in top_indices]
 
     def align_keywords(self, keywords: List[str], threshold: float = 0.85) -> List[str]:
         """Align similar keywords to their most common form."""
@@ -97,51 +236,33 @@ class KeywordExtractor:
         if all(k in self.keyword_alignment_cache for k in keywords):
             return [self.keyword_alignment_cache[k] for k in keywords]
 
-        # Get embeddings for all keywords
-        embeddings = {k: self.get_embedding(k) for k in keywords}
-
-        # Calculate similarity matrix
-        n = len(keywords)
-        similarity_matrix = np.zeros((n, n))
-
-        for i in range(n):
-            for j in range(i + 1, n):
-                sim = cosine_similarity(
-                        embeddings[keywords[i]].reshape(1, -1),
-                        embeddings[keywords[j]].reshape(1, -1)
-                        )[0][0]
-                similarity_matrix[i][j] = sim
-                similarity_matrix[j][i] = sim
-
-        # Cluster similar keywords
-        clusters: List[Set[str]] = []
-        used = set()
-
-        for i in range(n):
-            if keywords[i] in used:
-                continue
+        # Get embeddings for all keywords, one contiguous float32 row per keyword
+        matrix = self.get_embeddings_batch(keywords)
 
-            cluster = {keywords[i]}
-            used.add(keywords[i])
+        # Calculate similarity matrix with a single matrix product
+        similarity_matrix = matrix @ matrix.T
+        np.fill_diagonal(similarity_matrix, 0)
 
-            for j in range(n):
-                if i != j and similarity_matrix[i][j] >= threshold:
-                    cluster.add(keywords[j])
-                    used.add(keywords[j])
+        # Cluster similar keywords as connected components of the thresholded matrix
+        adjacency = csr_matrix(similarity_matrix >= threshold)
+        _, labels = connected_components(adjacency, directed = False)
 
-            clusters.append(cluster)
+        # Group keyword indices by cluster label
+        order = np.argsort(labels, kind = 'stable')
+        _, sizes = np.unique(labels, return_counts = True)
+        clusters = np.split(order, np.cumsum(sizes)[:-1])
 
         # For each cluster, select the most representative keyword
         aligned_keywords = []
-        for cluster in clusters:
+        for indices in clusters:
             # Use the most frequent keyword in the original list as representative
-            counts = Counter(k for k in keywords if k in cluster)
+            counts = Counter(keywords[i] for i in indices)
             representative = max(counts.items(), key = lambda x: x[1])[0]
 
             # Update cache
-            for k in cluster:
+            for k in counts:
                 self.keyword_alignment_cache[k] = representative
 
             aligned_keywords.append(representative)
 
-        return aligned_keywords
\ No newline at end of file
+        return aligned_keywords
@@ -1,31 +1,41 @@
 import ollama
-from typing import List, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from typing import List, Optional, Tuple
+from dataclasses import replace
 from datetime import datetime
-import json
-import re
+import logging
+import orjson
 from pathlib import Path
+from sklearn.feature_extraction.text import TfidfVectorizer
 
 from utils.database_manager import DatabaseManager
 from utils.qtype import Question
+from utils.question_cache import QuestionCache
 from utils.utilities import read_markdown, scan_folder, format_user_prompt, format_system_prompt
 from keyword_extractor import KeywordExtractor
 from logging_config import setup_logger
 
+# Files shorter than this are not worth generating questions from
+MIN_CONTENT_LENGTH = 200
+
 
 class QCMGenerator:
     def __init__(self, model: str = "llama3.1:latest",
-                 embedding_model: str = "nomic-embed-text"):
+                 embedding_model: str = "nomic-embed-text",
+                 max_workers: int = 4):
         self.model = model
+        # Number of files analyzed concurrently; keep at or below Ollama's OLLAMA_NUM_PARALLEL
+        self.max_workers = max_workers
         self.db_manager = DatabaseManager('../data/qcm_database.db')
+        self.question_cache = QuestionCache('../data/questions_cache.db')
         self.keyword_extractor = KeywordExtractor(embedding_model)
-        self.response_pattern = re.compile(
-                r'\|\s*([^|]+?)\s*\|\s*(\[[^\]]+\])\s*\|\s*([^|]+?)\s*\|\s*([^|]+?)\s*\|\s*"QCM"\s*\|\s*({[^}]+})\s*\|\s*(\[[^\]]+\])\s*\|'
-                )
         self.logger = setup_logger('qcm_generator')
 
     def clean_json_string(self, s: str) -> str:
         """Clean and format string for JSON parsing."""
-        self.logger.debug(f"Cleaning JSON string: {s}")
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug(f"Cleaning JSON string: {s}")
 
         # First, handle French apostrophes and quotes properly
         s = s.replace('"', '\\"')  # Escape existing double quotes
@@ -36,19 +46,23 @@ class QCMGenerator:
             s = f'"{s[1:-1]}"'
 
         s = s.strip()
-        self.logger.debug(f"Cleaned JSON string: {s}")
+        if debug:
+            self.logger.debug(f"Cleaned JSON string: {s}")
         return s
 
     def parse_choices(self, choices_str: str) -> dict:
         """Parse choices string into a dictionary."""
-        self.logger.debug(f"Attempting to parse choices: {choices_str}")
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug(f"Attempting to parse choices: {choices_str}")
 
         try:
             # First attempt: try direct JSON parsing
             try:
-                return json.loads(choices_str)
-            except json.JSONDecodeError as e:
-                self.logger.debug(f"Direct JSON parsing failed: {str(e)}")
+                return orjson.loads(choices_str)
+            except orjson.JSONDecodeError as e:
+                if debug:
+                    self.logger.debug(f"Direct JSON parsing failed: {str(e)}")
 
             # Second attempt: clean and try again
             cleaned = choices_str.replace('\\"', '"')
@@ -56,12 +70,14 @@ class QCMGenerator:
             cleaned = cleaned.replace("d'", "d'")
             cleaned = cleaned.replace("l'", "l'")
 
-            self.logger.debug(f"Cleaned choices string: {cleaned}")
+            if debug:
+                self.logger.debug(f"Cleaned choices string: {cleaned}")
 
             try:
-                return json.loads(cleaned)
-            except json.JSONDecodeError as e:
-                self.logger.debug(f"Cleaned JSON parsing failed: {str(e)}")
+                return orjson.loads(cleaned)
+            except orjson.JSONDecodeError as e:
+                if debug:
+                    self.logger.debug(f"Cleaned JSON parsing failed: {str(e)}")
 
                 # Final attempt: manual parsing
                 choices = {}
@@ -74,7 +90,8 @@ class QCMGenerator:
                         value = value.strip().strip('"')
                         choices[key] = value
 
-                self.logger.debug(f"Manual parsing result: {choices}")
+                if debug:
+                    self.logger.debug(f"Manual parsing result: {choices}")
                 return choices
 
         except Exception as e:
@@ -82,19 +99,39 @@ class QCMGenerator:
             self.logger.error(f"Error details: {str(e)}")
             raise e
 
-    def analyze_md(self, file_path: str) -> Optional[List[Question]]:
+    def analyze_md(self, file_path: str, content: Optional[str] = None,
+                   keywords: Optional[List[str]] = None) -> Optional[List[Question]]:
         """Analyze markdown file and generate questions."""
+        debug = self.logger.isEnabledFor(logging.DEBUG)
         file_name = Path(file_path).name
         self.logger.info(f"Processing file: {file_name}")
 
-        content = read_markdown(file_path)
-        if not content or len(content) < 200:
+        if content is None:
+            content = read_markdown(file_path)
+        if not content or len(content) < MIN_CONTENT_LENGTH:
             self.logger.warning(f"File {file_name} is too short or empty")
             return None
 
-        # Extract keywords
-        extracted_keywords = self.keyword_extractor.extract_keywords(content, num_keywords = 5)
-        self.logger.debug(f"Extracted keywords: {extracted_keywords}")
+        # Content already sent to the same model with the same prompts in an
+        # earlier run does not need another call
+        content_hash = QuestionCache.content_hash(content, self.model, format_system_prompt(), format_user_prompt())
+        try:
+            cached_questions = self.question_cache.get(content_hash)
+        except Exception as e:
+            self.logger.warning(f"Could not read the question cache for {file_name}: {str(e)}")
+            cached_questions = None
+        if cached_questions is not None:
+            self.logger.info(f"Reusing {len(cached_questions)} cached questions for {file_name}")
+            created_at = datetime.now().isoformat()
+            return [replace(question, source_file = file_path, created_at = created_at)
+                    for question in cached_questions]
+
+        # Extract keywords unless they were computed upfront
+        extracted_keywords = keywords
+        if extracted_keywords is None:
+            extracted_keywords = self.keyword_extractor.extract_keywords(content, num_keywords = 5)
+        if debug:
+            self.logger.debug(f"Extracted keywords: {extracted_keywords}")
 
         prompt = format_user_prompt().format(
                 content = content,
@@ -114,16 +151,57 @@ class QCMGenerator:
                     }
                 ])
 
-            self.logger.debug(f"Raw LLM response: {response['message']['content']}")
-            return self.parse_response(response['message']['content'], file_path)
+            if debug:
+                self.logger.debug(f"Raw LLM response: {response['message']['content']}")
+            questions = self.parse_response(response['message']['content'], file_path)
 
         except Exception as e:
             self.logger.error(f"Error during API call for {file_name}")
             self.logger.error(f"Error details: {str(e)}")
             return None
 
+        # The cache is only an optimisation: failing to fill it must not lose
+        # the questions just generated
+        if questions:
+            try:
+                self.question_cache.put(content_hash, questions)
+            except Exception as e:
+                self.logger.warning(f"Could not cache questions for {file_name}: {str(e)}")
+        return questions
+
+    @staticmethod
+    def split_table_row(line: str) -> Optional[Tuple[str, str, str, str, str, str]]:
+        """Split a markdown table row into its question fields, or return None if it is not a QCM row.
+
+        Expected layout: | subject | [keywords] | id | question | "QCM" | {choices} | [answers] |
+        """
+        line = line.strip()
+        if not (line.startswith('|') and line.endswith('|')):
+            return None
+
+        cells = [cell.strip() for cell in line[1:-1].split('|')]
+        if len(cells) < 7 or cells[4] != '"QCM"':
+            return None
+
+        subject, keywords, question_id, question_text = cells[:4]
+        # Choice labels may themselves contain a pipe, so rejoin everything between type and answers
+        choices = '|'.join(cells[5:-1]).strip()
+        answers = cells[-1]
+
+        if not (subject and question_id and question_text):
+            return None
+        if not (len(keywords) > 2 and keywords[0] == '[' and keywords[-1] == ']'):
+            return None
+        if not (len(choices) > 2 and choices[0] == '{' and choices[-1] == '}'):
+            return None
+        if not (len(answers) > 2 and answers[0] == '[' and answers[-1] == ']'):
+            return None
+
+        return subject, keywords, question_id, question_text, choices, answers
+
     def parse_response(self, response: str, source_file: str) -> List[Question]:
         """Parse the LLM response with detailed logging."""
+        debug = self.logger.isEnabledFor(logging.DEBUG)
         questions = []
         file_name = Path(source_file).name
         self.logger.info(f"Parsing response for {file_name}")
@@ -132,41 +210,44 @@ class QCMGenerator:
         cleaned_response = '\n'.join(line for line in response.split('\n')
                                      if line.strip() and not line.strip().startswith('|-'))
 
-        self.logger.debug(f"Cleaned response:\n{cleaned_response}")
-        matches = self.response_pattern.finditer(cleaned_response)
+        if debug:
+            self.logger.debug(f"Cleaned response:\n{cleaned_response}")
+        rows = [(line, cells) for line in cleaned_response.splitlines()
+                if (cells := self.split_table_row(line)) is not None]
 
-        # Count total matches
-        matches = list(matches)
-        total_matches = len(matches)
-        self.logger.info(f"Found {total_matches} potential questions in response")
+        # Count total rows
+        total_rows = len(rows)
+        self.logger.info(f"Found {total_rows} potential questions in response")
 
-        for i, match in enumerate(matches, 1):
+        for i, (line, cells) in enumerate(rows, 1):
             try:
-                self.logger.debug(f"Processing question {i}/{total_matches}")
-                self.logger.debug(f"Raw match: {match.group(0)}")
+                if debug:
+                    self.logger.debug(f"Processing question {i}/{total_rows}")
+                    self.logger.debug(f"Raw row: {line}")
 
                 # Parse each component with detailed logging
-                subject = match.group(1).strip()
-                keywords = self.parse_keywords(match.group(2))
-                question_id = match.group(3).strip()
-                question_text = match.group(4).strip()
+                subject, raw_keywords, question_id, question_text, raw_choices, raw_answers = cells
+                keywords = self.parse_keywords(raw_keywords)
 
-                self.logger.debug(f"Parsed components for question {question_id}:")
-                self.logger.debug(f"  Subject: {subject}")
-                self.logger.debug(f"  Keywords: {keywords}")
-                self.logger.debug(f"  Question: {question_text}")
+                if debug:
+                    self.logger.debug(f"Parsed components for question {question_id}:")
+                    self.logger.debug(f"  Subject: {subject}")
+                    self.logger.debug(f"  Keywords: {keywords}")
+                    self.logger.debug(f"  Question: {question_text}")
 
                 try:
-                    choices = self.parse_choices(match.group(5))
-                    self.logger.debug(f"  Choices: {choices}")
+                    choices = self.parse_choices(raw_choices)
+                    if debug:
+                        self.logger.debug(f"  Choices: {choices}")
                 except Exception as e:
                     self.logger.error(f"Failed to parse choices in question {question_id}")
-                    self.logger.error(f"Raw choices: {match.group(5)}")
+                    self.logger.error(f"Raw choices: {raw_choices}")
                     self.logger.error(f"Error: {str(e)}")
                     continue
 
-                answers = self.parse_answers(match.group(6))
-                self.logger.debug(f"  Answers: {answers}")
+                answers = self.parse_answers(raw_answers)
+                if debug:
+                    self.logger.debug(f"  Answers: {answers}")
 
                 # Validation with detailed logging
                 validation_errors = []
@@ -200,8 +281,8 @@ class QCMGenerator:
                 self.logger.info(f"Successfully parsed question {question_id}")
 
             except Exception as e:
-                self.logger.error(f"Error parsing question {i}/{total_matches}")
-                self.logger.error(f"Raw match: {match.group(0)}")
+                self.logger.error(f"Error parsing question {i}/{total_rows}")
+                self.logger.error(f"Raw row: {line}")
                 self.logger.error(f"Error details: {str(e)}")
                 continue
 
@@ -213,42 +294,98 @@ class QCMGenerator:
 
         return questions
 
+    def _fit_tfidf(self, folder_path: str) -> Optional[TfidfVectorizer]:
+        """Fit a single TF-IDF vocabulary over every markdown file in the folder."""
+        contents = (read_markdown(file_path) for file_path in scan_folder(folder_path))
+        try:
+            return TfidfVectorizer(max_features = 20000, sublinear_tf = True).fit(
+                    content for content in contents if content
+                    )
+        except ValueError as e:
+            self.logger.warning(f"Could not fit TF-IDF vocabulary on folder: {str(e)}")
+            return None
+
+    def _save_results(self, future: Future, file_name: str) -> Optional[int]:
+        """Insert the questions generated for a file, returning how many were saved or None on failure."""
+        try:
+            questions = future.result()
+        except Exception as e:
+            self.logger.error(f"Unexpected error while analyzing {file_name}")
+            self.logger.error(f"Error details: {str(e)}")
+            questions = None
+
+        if not questions:
+            self.logger.error(f"Failed to process {file_name}")
+            return None
+
+        try:
+            self.db_manager.insert_questions(questions)
+        except Exception as e:
+            self.logger.error(f"Failed to insert questions from {file_name}")
+            self.logger.error(f"Error details: {str(e)}")
+            return None
+
+        self.logger.info(f"Successfully processed {len(questions)} questions from {file_name}")
+        return len(questions)
+
     def process_folder(self, folder_path: str):
         """Process all markdown files with detailed logging."""
         self.logger.info(f"Starting folder processing: {folder_path}")
-        md_files = scan_folder(folder_path)
         total_questions = 0
         processed_files = 0
         failed_files = []
 
-        self.logger.info(f"Found {len(md_files)} markdown files")
-
-        for file_path in md_files:
-            file_name = Path(file_path).name
-            self.logger.info(f"\nProcessing file: {file_name}")
-
-            questions = self.analyze_md(file_path)
-
-            if questions:
-                for question in questions:
-                    try:
-                        self.db_manager.insert_question(question)
-                    except Exception as e:
-                        self.logger.error(f"Failed to insert question {question.question_id}")
-                        self.logger.error(f"Error details: {str(e)}")
-                        continue
-
-                total_questions += len(questions)
-                processed_files += 1
-                self.logger.info(f"Successfully processed {len(questions)} questions from {file_name}")
-            else:
-                self.logger.error(f"Failed to process {file_name}")
-                failed_files.append(file_name)
+        # The folder is streamed twice: once to fit the TF-IDF vocabulary,
+        # then again to analyze files as the walk reaches them
+        tfidf = self._fit_tfidf(folder_path)
+        # Built once here: get_feature_names_out() sorts the whole vocabulary
+        tfidf_terms = tfidf.get_feature_names_out() if tfidf is not None else None
+
+        def usable_files():
+            for file_path in scan_folder(folder_path):
+                # A file under MIN_CONTENT_LENGTH bytes cannot hold that many characters
+                content = read_markdown(file_path, min_size = MIN_CONTENT_LENGTH)
+                if content and len(content) >= MIN_CONTENT_LENGTH:
+                    yield content, file_path
+                else:
+                    file_name = Path(file_path).name
+                    self.logger.warning(f"File {file_name} is too short or empty")
+                    failed_files.append(file_name)
+
+        def collect(futures):
+            nonlocal total_questions, processed_files
+            for future in futures:
+                file_name = Path(pending.pop(future)).name
+                saved = self._save_results(future, file_name)
+                if saved is None:
+                    failed_files.append(file_name)
+                else:
+                    total_questions += saved
+                    processed_files += 1
+
+        # LLM calls are I/O bound, so analyze several files concurrently and
+        # keep database inserts on this thread as results come in. At most
+        # max_pending files are in flight, so memory does not grow with the folder.
+        max_pending = self.max_workers * 2
+        pending = {}
+        with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+            docs = self.keyword_extractor.parse_documents(usable_files(), as_tuples = True)
+            for doc, file_path in docs:
+                keywords = self.keyword_extractor.extract_keywords_from_doc(doc, doc.text, num_keywords = 5,
+                                                                            tfidf = tfidf,
+                                                                            tfidf_terms = tfidf_terms)
+                pending[executor.submit(self.analyze_md, file_path, doc.text, keywords)] = file_path
+
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                    collect(done)
+
+            collect(as_completed(pending))
 
         self.logger.info("\nProcessing Summary:")
-        self.logger.info(f"Files processed: {processed_files}/{len(md_files)}")
+        self.logger.info(f"Files processed: {processed_files}/{processed_files + len(failed_files)}")
         self.logger.info(f"Total questions generated: {total_questions}")
         if failed_files:
             self.logger.warning("Failed files:")
             for file in failed_files:
-                self.logger.warning(f"  - {file}")
\ No newline at end of file
+                self.logger.warning(f"  - {file}")
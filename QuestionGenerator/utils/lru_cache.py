@@ -0,0 +1,42 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar('K', bound = Hashable)
+V = TypeVar('V')
+
+
+class LRUCache(Generic[K, V]):
+    """Dict-like cache holding at most max_entries items, evicting the least recently used."""
+
+    def __init__(self, max_entries: int = 5000):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be a positive integer, got {max_entries!r}")
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, key: K) -> V:
+        value = self._data[key]
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: K, value: V):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_entries:
+            self._data.popitem(last = False)
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        """Return the cached value for key, or default if it is missing."""
+        if key in self._data:
+            return self[key]
+        return default
+
+    def clear(self):
+        """Remove every cached entry."""
+        self._data.clear()
@@ -3,6 +3,10 @@ from dataclasses import dataclass
 
 @dataclass
 class Question:
+    # Declared by hand rather than with dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('subject', 'keywords', 'question_id', 'question_text', 'question_type',
+                 'choices', 'answers', 'source_file', 'created_at')
+
     subject: str
     keywords: List[str]
     question_id: str
@@ -12,3 +16,17 @@ class Question:
     answers: List[str]
     source_file: str
     created_at: str
+
+
+@dataclass
+class QuestionSummary:
+    """The fields of a Question that list views show, without its JSON fields."""
+    __slots__ = ('subject', 'question_id', 'question_text', 'question_type',
+                 'source_file', 'created_at')
+
+    subject: str
+    question_id: str
+    question_text: str
+    question_type: str
+    source_file: str
+    created_at: str
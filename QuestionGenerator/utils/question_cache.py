@@ -0,0 +1,57 @@
+import hashlib
+import sqlite3
+from typing import List, Optional
+
+import orjson
+
+from utils.qtype import Question
+
+
+class QuestionCache:
+    """Persistent cache of generated questions, keyed by the sha256 of the source content and generation settings."""
+
+    def __init__(self, db_path: str = "questions_cache.db"):
+        self.db_path = db_path
+        self.init_database()
+
+    def init_database(self):
+        """Initialize the cache table."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS q_cache (
+                    hash TEXT PRIMARY KEY,
+                    questions BLOB NOT NULL
+                )
+            ''')
+            conn.commit()
+
+    @staticmethod
+    def content_hash(content: str, *settings: str) -> str:
+        """Hash markdown content, with the model and prompts that generate from it, into a cache key."""
+        digest = hashlib.sha256()
+        for part in (content, *settings):
+            # Length-prefixed so different splits of the same text never collide
+            encoded = part.encode('utf-8')
+            digest.update(len(encoded).to_bytes(8, 'big'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, content_hash: str) -> Optional[List[Question]]:
+        """Return the questions cached for this content, or None on a miss."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT questions FROM q_cache WHERE hash = ?', (content_hash,))
+            row = cursor.fetchone()
+        if not row:
+            return None
+        return [Question(**question) for question in orjson.loads(row[0])]
+
+    def put(self, content_hash: str, questions: List[Question]):
+        """Cache the questions generated for this content."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                    'INSERT OR REPLACE INTO q_cache (hash, questions) VALUES (?, ?)',
+                    (content_hash, orjson.dumps(questions))
+                    )
+            conn.commit()
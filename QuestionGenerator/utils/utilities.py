@@ -1,36 +1,53 @@
+import functools
+import mmap
 import os
-from typing import List, Optional
+from pathlib import Path
+from typing import Iterator, Optional
 
+# Files larger than this are read through mmap rather than a buffered read
+MMAP_THRESHOLD = 1024 * 1024
 
-def scan_folder(path: str) -> List[str]:
-    """Scan folder for markdown files."""
-    md_files = []
-    for root, _, files in os.walk(path):
-        md_files.extend(
-                os.path.join(root, file)
-                for file in files
-                if file.endswith('.md')
-                )
-    return md_files
+
+def scan_folder(path: str) -> Iterator[str]:
+    """Scan folder for markdown files, yielding paths as the walk finds them."""
+    # Missing or unreadable folders are reported and skipped, as os.walk did
+    try:
+        entries = os.scandir(path)
+    except OSError as e:
+        print(f"Error scanning folder {path}: {str(e)}")
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks = False):
+                yield from scan_folder(entry.path)
+            elif entry.is_file() and entry.name.endswith('.md'):
+                yield entry.path
 
 
-def read_markdown(file_path: str) -> Optional[str]:
-    """Read markdown file content safely."""
+def read_markdown(file_path: str, min_size: int = 0) -> Optional[str]:
+    """Read markdown file content safely, returning None for files under min_size bytes."""
     try:
-        with open(file_path, 'r', encoding = 'utf-8') as md:
-            return md.read()
+        size = os.stat(file_path).st_size
+        if size < min_size:
+            return None
+        if size > MMAP_THRESHOLD:
+            with open(file_path, 'rb') as md, mmap.mmap(md.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+                return mm[:].decode('utf-8')
+        return Path(file_path).read_bytes().decode('utf-8')
     except Exception as e:
         print(f"Error reading file {file_path}: {str(e)}")
         return None
 
+@functools.lru_cache(maxsize = None)
 def format_system_prompt(system_prompt:str="./prompt/system_prompt"):
+    """Read the system prompt, cached so the file is only read once per process."""
     with open(system_prompt,'r') as prompt_file:
         prompt = prompt_file.read()
-        prompt_file.close()
     return prompt
 
+@functools.lru_cache(maxsize = None)
 def format_user_prompt(user_prompt:str= "./prompt/user_prompt"):
+    """Read the user prompt template, cached so the file is only read once per process."""
     with open(user_prompt,'r') as prompt_file:
         prompt = prompt_file.read()
-        prompt_file.close()
-    return prompt
\ No newline at end of file
+    return prompt
@@ -17,7 +17,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-db = DatabaseManager('../data/qcm_database.db')
+# Opened and closed with the app so connections persist across requests
+db: Optional[DatabaseManager] = None
+
+@app.on_event("startup")
+def open_database():
+    global db
+    db = DatabaseManager('../data/qcm_database.db')
+
+@app.on_event("shutdown")
+def close_database():
+    db.close()
 
 class QuestionResponse(BaseModel):
     id: int
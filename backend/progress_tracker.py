@@ -1,4 +1,5 @@
 from datetime import datetime
+import random
 import sqlite3
 from typing import List, Dict, Optional
 
@@ -23,16 +24,50 @@ class ProgressTracker:
                 )
             ''')
 
+            # Older databases keyed question_stats on a surrogate id, which left
+            # nothing for the ON CONFLICT(question_id) upsert to match against
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(question_stats)')]
+            if 'id' in columns:
+                cursor.execute('ALTER TABLE question_stats RENAME TO question_stats_old')
+
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS question_stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    question_id INTEGER NOT NULL,
+                    question_id INTEGER PRIMARY KEY,
                     times_shown INTEGER DEFAULT 0,
                     times_correct INTEGER DEFAULT 0,
                     last_shown TEXT,
                     difficulty_rating REAL DEFAULT 0.5
                 )
             ''')
+
+            if 'id' in columns:
+                cursor.execute('''
+                    INSERT INTO question_stats (
+                        question_id, times_shown, times_correct,
+                        last_shown, difficulty_rating
+                    )
+                    SELECT question_id, SUM(times_shown), SUM(times_correct),
+                           MAX(last_shown), AVG(difficulty_rating)
+                    FROM question_stats_old
+                    GROUP BY question_id
+                ''')
+                cursor.execute('DROP TABLE question_stats_old')
+
+            # Generated column so the success rate can be indexed instead of
+            # recomputed for every row of the recommendations query
+            columns = [row[1] for row in cursor.execute('PRAGMA table_xinfo(question_stats)')]
+            if 'success_rate' not in columns:
+                cursor.execute('''
+                    ALTER TABLE question_stats ADD COLUMN success_rate REAL
+                    GENERATED ALWAYS AS (
+                        CAST(times_correct AS REAL) /
+                            CASE WHEN times_shown = 0 THEN 1 ELSE times_shown END
+                    ) VIRTUAL
+                ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_qs_success_rate
+                ON question_stats(times_shown, success_rate)
+            ''')
             conn.commit()
 
     def record_attempt(self, user_id: str, subject: str,
@@ -40,6 +75,8 @@ class ProgressTracker:
                        correct_answers: List[bool]):
         """Record a quiz attempt and update question statistics."""
         score = sum(correct_answers) / len(questions) * 100
+        # One timestamp for the attempt and every statistic it updates
+        now_iso = datetime.now().isoformat()
 
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
@@ -52,7 +89,7 @@ class ProgressTracker:
                 ) VALUES (?, ?, ?, ?, ?, ?)
             ''', (
                 user_id,
-                datetime.now().isoformat(),
+                now_iso,
                 subject,
                 score,
                 len(questions),
@@ -60,23 +97,19 @@ class ProgressTracker:
                 ))
 
             # Update question statistics
-            for q_id, is_correct in zip(questions, correct_answers):
-                cursor.execute('''
-                    INSERT INTO question_stats (
-                        question_id, times_shown, times_correct,
-                        last_shown
-                    ) VALUES (?, 1, ?, ?)
-                    ON CONFLICT(question_id) DO UPDATE SET
-                        times_shown = times_shown + 1,
-                        times_correct = times_correct + ?,
-                        last_shown = ?
-                ''', (
-                    q_id,
-                    1 if is_correct else 0,
-                    datetime.now().isoformat(),
-                    1 if is_correct else 0,
-                    datetime.now().isoformat()
-                    ))
+            cursor.executemany('''
+                INSERT INTO question_stats (
+                    question_id, times_shown, times_correct,
+                    last_shown
+                ) VALUES (?, 1, ?, ?)
+                ON CONFLICT(question_id) DO UPDATE SET
+                    times_shown = times_shown + 1,
+                    times_correct = times_correct + excluded.times_correct,
+                    last_shown = excluded.last_shown
+            ''', [
+                (q_id, 1 if is_correct else 0, now_iso)
+                for q_id, is_correct in zip(questions, correct_answers)
+                ])
 
             conn.commit()
 
@@ -138,37 +171,34 @@ class ProgressTracker:
                                      subject: Optional[str] = None,
                                      limit: int = 10) -> List[int]:
         """Get recommended questions based on difficulty and past performance."""
+        recommendations = []
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.cursor()
 
-            query = '''
-                SELECT 
-                    qs.question_id,
-                    CAST(qs.times_correct AS FLOAT) / 
-                        CASE WHEN qs.times_shown = 0 THEN 1 
-                        ELSE qs.times_shown END as success_rate,
-                    qs.last_shown
-                FROM question_stats qs
-                JOIN questions q ON qs.question_id = q.id
-                WHERE 1=1
-            '''
-            params = []
-
-            if subject:
-                query += " AND q.subject = ?"
-                params.append(subject)
-
-            query += '''
-                ORDER BY 
-                    CASE 
-                        WHEN qs.times_shown = 0 THEN 1
-                        WHEN success_rate < 0.3 THEN 2
-                        ELSE 3
-                    END,
-                    RANDOM()
-                LIMIT ?
-            '''
-            params.append(limit)
-
-            cursor.execute(query, params)
-            return [row[0] for row in cursor.fetchall()]
\ No newline at end of file
+            # One query per priority bucket (never shown, under 30% success,
+            # the rest). Each reads only the bucket's ids from
+            # idx_qs_success_rate, and the random pick is made here, so no
+            # rows are sorted; later buckets are skipped once limit is reached
+            for bucket in ('qs.times_shown = 0',
+                           'qs.times_shown > 0 AND qs.success_rate < 0.3',
+                           'qs.times_shown > 0 AND qs.success_rate >= 0.3'):
+                remaining = limit - len(recommendations)
+                if remaining <= 0:
+                    break
+
+                query = '''
+                    SELECT qs.question_id
+                    FROM question_stats qs
+                    JOIN questions q ON qs.question_id = q.id
+                    WHERE ''' + bucket
+                params = []
+
+                if subject:
+                    query += " AND q.subject = ?"
+                    params.append(subject)
+
+                cursor.execute(query, params)
+                question_ids = [row[0] for row in cursor.fetchall()]
+                recommendations.extend(random.sample(question_ids, min(remaining, len(question_ids))))
+
+        return recommendations
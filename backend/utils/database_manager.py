@@ -1,108 +1,416 @@
 import sqlite3
 import json
 import random
-from typing import List, Optional, Dict
-from utils.qtype import Question
+import threading
+from functools import lru_cache
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple
+from utils.qtype import Question, QuestionSummary
 from datetime import datetime
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(value) -> bytes:
+        return json.dumps(value, ensure_ascii = False).encode('utf-8')
+
+
+# JSON columns are stored as UTF-8 BLOBs, read back as bytes and handed to
+# the JSON decoder without building a str first (rows written before the
+# switch stay TEXT and decode the same). SQLite's JSON functions reject
+# BLOBs, hence the CASTs wherever SQL reads into them.
+
+# Trigger bodies keeping the keywords and question_keywords tables in step
+# with a question row
+_ADD_KEYWORD_USES = '''
+    INSERT INTO keywords (name, uses)
+    SELECT value, 1 FROM json_each(CAST({row}.keywords AS TEXT)) WHERE true
+    ON CONFLICT (name) DO UPDATE SET uses = uses + 1;
+    INSERT OR IGNORE INTO question_keywords (question_id, keyword_id)
+    SELECT {row}.id, id FROM keywords WHERE name IN (SELECT value FROM json_each(CAST({row}.keywords AS TEXT)));
+'''
+_REMOVE_KEYWORD_USES = '''
+    DELETE FROM question_keywords WHERE question_id = {row}.id;
+    UPDATE keywords
+    SET uses = uses - (SELECT COUNT(*) FROM json_each(CAST({row}.keywords AS TEXT)) WHERE value = keywords.name)
+    WHERE name IN (SELECT value FROM json_each(CAST({row}.keywords AS TEXT)));
+    DELETE FROM keywords
+    WHERE uses <= 0 AND name IN (SELECT value FROM json_each(CAST({row}.keywords AS TEXT)));
+'''
+
+
+def _fts_keywords(table: str) -> str:
+    """SQL expression giving a row's keywords as plain text for the full-text index."""
+    return f"(SELECT group_concat(value, ' ') FROM json_each(CAST({table}.keywords AS TEXT)))"
+
+
+# Columns read back into a Question, in its field order, selected by name
+# rather than with *
+_COLUMNS = ('subject', 'keywords', 'question_id', 'question_text', 'question_type',
+            'choices', 'answers', 'source_file', 'created_at')
+_COLS = ', '.join(_COLUMNS)
+# Columns read back into a QuestionSummary, in its field order
+_SUMMARY_COLS = 'subject, question_id, question_text, question_type, source_file, created_at'
+
+# Statements are kept as fixed strings so every call hits the connection's
+# prepared statement cache, which is keyed by the exact SQL text
+_INSERT_QUESTION = '''
+    INSERT INTO questions (
+        subject, keywords, question_id, question_text,
+        question_type, choices, answers, source_file, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+_SELECT_BY_ID = f'SELECT {_COLS} FROM questions WHERE id = ?'
+# Separate subqueries: SQLite only seeks the end of an index for a lone MIN or MAX
+_SELECT_ID_RANGE = 'SELECT (SELECT MIN(id) FROM questions), (SELECT MAX(id) FROM questions)'
+_SELECT_FROM_ID = f'SELECT {_COLS} FROM questions WHERE id >= ? ORDER BY id LIMIT 1'
+_SELECT_SUBJECTS = 'SELECT DISTINCT subject FROM questions ORDER BY subject'
+_SELECT_KEYWORDS = 'SELECT name FROM keywords ORDER BY name'
+# Separate scalar subqueries so each one can use its own index
+_SELECT_STATS = '''
+    SELECT
+        (SELECT COUNT(*) FROM questions),
+        (SELECT COUNT(DISTINCT subject) FROM questions),
+        (SELECT MAX(created_at) FROM questions),
+        (SELECT COUNT(*) FROM keywords)
+'''
+_COUNT_PER_SUBJECT = 'SELECT subject, COUNT(*) FROM questions GROUP BY subject'
+_SEARCH = f'''
+    SELECT {', '.join('q.' + column for column in _COLUMNS)} FROM questions_fts f
+    JOIN questions q ON q.id = f.rowid
+    WHERE questions_fts MATCH ?
+    ORDER BY bm25(questions_fts)
+    LIMIT ?
+'''
+
+
+@lru_cache(maxsize = 128)
+def _placeholders(count: int) -> str:
+    """Parenthesised list of count parameter placeholders, for use with IN."""
+    return '(' + ', '.join('?' * count) + ')'
+
+
+@lru_cache(maxsize = 128)
+def _filter_clause(subject: bool, keyword_count: int) -> str:
+    """Build the WHERE clause for a subject and keyword filter shape, once per shape."""
+    conditions = []
+    if subject:
+        conditions.append('subject = ?')
+    if keyword_count:
+        # Look the keywords up through the question_keywords link table
+        conditions.append('id IN (SELECT qk.question_id FROM question_keywords qk'
+                          ' JOIN keywords k ON k.id = qk.keyword_id'
+                          f' WHERE k.name IN {_placeholders(keyword_count)})')
+    return ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+
+@lru_cache(maxsize = 128)
+def _select_questions(where: str, tail: str = '', columns: str = _COLS) -> str:
+    """Build a SELECT over questions from a filter clause, once per statement."""
+    query = f'SELECT {columns} FROM questions{where}'
+    return f'{query} {tail}' if tail else query
+
 
 class DatabaseManager:
     def __init__(self, db_path: str = "qcm_database.db"):
         self.db_path = db_path
+        # Each thread reuses one persistent connection, so its page cache
+        # survives between calls. Connections are in autocommit mode; writes
+        # open their own transaction in _transaction(), one writer at a time.
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.RLock()
         self.init_database()
 
+    def _get_conn(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread = False, isolation_level = None)
+            conn.row_factory = sqlite3.Row
+            self._configure_connection(conn)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection):
+        """Apply the connection pragmas."""
+        # Only takes effect on a new database (or after VACUUM), and must come
+        # before switching to WAL
+        conn.execute('PRAGMA page_size=8192')
+        # WAL lets readers run alongside the writer; in WAL mode NORMAL only
+        # syncs at checkpoints and stays crash safe
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        # 64 MiB page cache per connection
+        conn.execute('PRAGMA cache_size=-65536')
+        # Map up to 256 MiB of the file: pages are then read through pointers
+        # into the OS page cache instead of read() calls copying them
+        conn.execute('PRAGMA mmap_size=268435456')
+        # Keep sorter and temporary index data in memory
+        conn.execute('PRAGMA temp_store=MEMORY')
+
+    @contextmanager
+    def _cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Yield a cursor on the calling thread's connection for read statements."""
+        cursor = self._get_conn().cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def _snapshot(self) -> Iterator[sqlite3.Cursor]:
+        """Yield a cursor whose reads all see the same state of the database."""
+        with self._cursor() as cursor:
+            cursor.execute('BEGIN')
+            try:
+                yield cursor
+            finally:
+                cursor.execute('COMMIT')
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Run the enclosed statements in a single transaction."""
+        with self._write_lock, self._cursor() as cursor:
+            # Take the database write lock as the transaction starts, so a
+            # writer in another process makes this one wait out the busy
+            # timeout instead of failing with SQLITE_BUSY partway through
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+
+    def close(self):
+        """Close every connection opened by this manager."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
     def init_database(self):
         """Initialize the database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._transaction() as cursor:
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS questions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     subject TEXT NOT NULL,
-                    keywords TEXT NOT NULL,
+                    keywords BLOB NOT NULL,
                     question_id TEXT NOT NULL,
                     question_text TEXT NOT NULL,
                     question_type TEXT NOT NULL,
-                    choices TEXT NOT NULL,
-                    answers TEXT NOT NULL,
+                    choices BLOB NOT NULL,
+                    answers BLOB NOT NULL,
                     source_file TEXT NOT NULL,
                     created_at TEXT NOT NULL
                 )
             ''')
-            conn.commit()
+            # subject serves DISTINCT/GROUP BY subject, created_at the latest-first
+            # listing, and the composite index subject-filtered latest-first pages
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_subject ON questions(subject)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_at ON questions(created_at DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_subject_created ON questions(subject, created_at DESC)')
 
-    def _row_to_question(self, row: tuple) -> Question:
+            # Full-text index over the searchable columns, kept in sync with
+            # questions by triggers (FTS5 external content table). Keywords are
+            # indexed as their decoded JSON values so escaped accents still match.
+            fts_exists = cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'questions_fts'"
+                    ).fetchone()
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+                    question_text, subject, keywords,
+                    content = 'questions', content_rowid = 'id',
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            ''')
+            # All triggers are recreated on every start so existing databases
+            # pick up their current bodies
+            for trigger in ('questions_fts_insert', 'questions_fts_delete', 'questions_fts_update',
+                            'keywords_insert', 'keywords_delete', 'keywords_update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute(f'''
+                CREATE TRIGGER questions_fts_insert AFTER INSERT ON questions BEGIN
+                    INSERT INTO questions_fts (rowid, question_text, subject, keywords)
+                    VALUES (new.id, new.question_text, new.subject, {_fts_keywords('new')});
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER questions_fts_delete AFTER DELETE ON questions BEGIN
+                    INSERT INTO questions_fts (questions_fts, rowid, question_text, subject, keywords)
+                    VALUES ('delete', old.id, old.question_text, old.subject, {_fts_keywords('old')});
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER questions_fts_update AFTER UPDATE ON questions BEGIN
+                    INSERT INTO questions_fts (questions_fts, rowid, question_text, subject, keywords)
+                    VALUES ('delete', old.id, old.question_text, old.subject, {_fts_keywords('old')});
+                    INSERT INTO questions_fts (rowid, question_text, subject, keywords)
+                    VALUES (new.id, new.question_text, new.subject, {_fts_keywords('new')});
+                END
+            ''')
+            if not fts_exists:
+                # Index the rows of a database created before the FTS table
+                cursor.execute(f'''
+                    INSERT INTO questions_fts (rowid, question_text, subject, keywords)
+                    SELECT id, question_text, subject, {_fts_keywords('questions')}
+                    FROM questions
+                ''')
+
+            # Distinct keywords with the number of times questions use them,
+            # maintained by triggers so statistics never decode the JSON column
+            keywords_exists = cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'keywords'"
+                    ).fetchone()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS keywords (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE NOT NULL,
+                    uses INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            links_exist = cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'question_keywords'"
+                    ).fetchone()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS question_keywords (
+                    question_id INTEGER NOT NULL,
+                    keyword_id INTEGER NOT NULL,
+                    PRIMARY KEY (question_id, keyword_id)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_question_keywords_keyword ON question_keywords(keyword_id, question_id)')
+            cursor.execute(f'''
+                CREATE TRIGGER keywords_insert AFTER INSERT ON questions BEGIN
+                    {_ADD_KEYWORD_USES.format(row = 'new')}
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER keywords_delete AFTER DELETE ON questions BEGIN
+                    {_REMOVE_KEYWORD_USES.format(row = 'old')}
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER keywords_update AFTER UPDATE OF keywords ON questions BEGIN
+                    {_REMOVE_KEYWORD_USES.format(row = 'old')}
+                    {_ADD_KEYWORD_USES.format(row = 'new')}
+                END
+            ''')
+            if not keywords_exists:
+                cursor.execute('''
+                    INSERT INTO keywords (name, uses)
+                    SELECT value, COUNT(*) FROM questions, json_each(CAST(questions.keywords AS TEXT))
+                    GROUP BY value
+                ''')
+            if not links_exist:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO question_keywords (question_id, keyword_id)
+                    SELECT questions.id, keywords.id
+                    FROM questions, json_each(CAST(questions.keywords AS TEXT))
+                    JOIN keywords ON keywords.name = json_each.value
+                ''')
+
+    @staticmethod
+    def _build_filter(subject: Optional[str], keywords: Optional[List[str]]) -> Tuple[str, list]:
+        """Return the WHERE clause and its parameters for a subject and keywords filter."""
+        params = [subject] if subject else []
+        if keywords:
+            params.extend(keywords)
+        return _filter_clause(bool(subject), len(keywords or ())), params
+
+    @staticmethod
+    def _fts_phrase(text: str) -> str:
+        """Quote text as an FTS5 phrase so user input is never parsed as query syntax."""
+        return '"' + text.replace('"', '""') + '"'
+
+    def _row_to_question(self, row: sqlite3.Row) -> Question:
         """Convert a database row to a Question object."""
+        # Positional in Question's field order, so no kwargs dict is built per row
         return Question(
-                subject = row[1],
-                keywords = json.loads(row[2]),
-                question_id = row[3],
-                question_text = row[4],
-                question_type = row[5],
-                choices = json.loads(row[6]),
-                answers = json.loads(row[7]),
-                source_file = row[8],
-                created_at = row[9]
+                row['subject'],
+                _json_loads(row['keywords']),
+                row['question_id'],
+                row['question_text'],
+                row['question_type'],
+                _json_loads(row['choices']),
+                _json_loads(row['answers']),
+                row['source_file'],
+                row['created_at']
                 )
 
+    @staticmethod
+    def _to_row(question: Question) -> tuple:
+        """Convert a Question object to the parameters of _INSERT_QUESTION."""
+        return (
+            question.subject,
+            _json_dumps(question.keywords),
+            question.question_id,
+            question.question_text,
+            question.question_type,
+            _json_dumps(question.choices),
+            _json_dumps(question.answers),
+            question.source_file,
+            question.created_at
+            )
+
     def insert_question(self, question: Question):
         """Insert a question into the database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO questions (
-                    subject, keywords, question_id, question_text,
-                    question_type, choices, answers, source_file, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                question.subject,
-                json.dumps(question.keywords),
-                question.question_id,
-                question.question_text,
-                question.question_type,
-                json.dumps(question.choices),
-                json.dumps(question.answers),
-                question.source_file,
-                question.created_at
-                ))
-            conn.commit()
+        with self._transaction() as cursor:
+            cursor.execute(_INSERT_QUESTION, self._to_row(question))
+
+    def insert_questions(self, questions: Iterable[Question]):
+        """Insert several questions in a single transaction."""
+        with self._transaction() as cursor:
+            cursor.executemany(_INSERT_QUESTION, map(self._to_row, questions))
 
     def load_question(self, question_id: int) -> Optional[Question]:
         """Load a specific question by its database ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM questions WHERE id = ?', (question_id,))
+        with self._cursor() as cursor:
+            cursor.execute(_SELECT_BY_ID, (question_id,))
             row = cursor.fetchone()
             return self._row_to_question(row) if row else None
 
     def load_random_question(self, subject: Optional[str] = None,
                              keywords: Optional[List[str]] = None) -> Optional[Question]:
         """Load a random question, optionally filtered by subject and/or keywords."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            query = 'SELECT * FROM questions'
-            params = []
-            conditions = []
-
-            if subject:
-                conditions.append('subject = ?')
-                params.append(subject)
+        with self._cursor() as cursor:
+            if not keywords and not subject:
+                # Pick a random point in the id range and take the first row from
+                # there: two index seeks instead of sorting every row. Rows just
+                # after gaps left by deletions are slightly favoured.
+                min_id, max_id = cursor.execute(_SELECT_ID_RANGE).fetchone()
+                if max_id is None:
+                    return None
 
-            if keywords:
-                # Check if any of the provided keywords exist in the keywords JSON array
-                keyword_conditions = ' OR '.join(
-                        'keywords LIKE ?' for _ in keywords
-                        )
-                conditions.append(f'({keyword_conditions})')
-                params.extend(f'%{k}%' for k in keywords)
+                cursor.execute(_SELECT_FROM_ID, (random.randint(min_id, max_id),))
+                row = cursor.fetchone()
+                return self._row_to_question(row) if row else None
 
-            if conditions:
-                query += ' WHERE ' + ' AND '.join(conditions)
+        # Filtered rows are interleaved in the id range, so sampling ids would
+        # be heavily skewed; count the matching rows and jump to a random
+        # offset along the id order instead. Both steps walk the same index, and run
+        # in one read transaction so the count still holds for the offset.
+        where, params = self._build_filter(subject, keywords)
+        count_query = _select_questions(where, columns = 'COUNT(*)')
+        pick_query = _select_questions(where, 'ORDER BY id LIMIT 1 OFFSET ?')
+        with self._snapshot() as cursor:
+            count = cursor.execute(count_query, params).fetchone()[0]
+            if not count:
+                return None
 
-            query += ' ORDER BY RANDOM() LIMIT 1'
-
-            cursor.execute(query, params)
+            cursor.execute(pick_query, params + [random.randrange(count)])
             row = cursor.fetchone()
             return self._row_to_question(row) if row else None
 
@@ -111,84 +419,85 @@ class DatabaseManager:
                        keywords: Optional[List[str]] = None,
                        shuffle: bool = False) -> List[Question]:
         """Load multiple questions with various filtering options."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            query = 'SELECT * FROM questions'
-            params = []
-            conditions = []
-
-            if subject:
-                conditions.append('subject = ?')
-                params.append(subject)
+        return list(self.iter_questions(limit, offset, subject, keywords, shuffle))
 
-            if keywords:
-                keyword_conditions = ' OR '.join(
-                        'keywords LIKE ?' for _ in keywords
-                        )
-                conditions.append(f'({keyword_conditions})')
-                params.extend(f'%{k}%' for k in keywords)
+    def iter_questions(self, limit: int = 10, offset: int = 0,
+                       subject: Optional[str] = None,
+                       keywords: Optional[List[str]] = None,
+                       shuffle: bool = False) -> Iterator[Question]:
+        """Yield questions as they are read, with the same filters as load_questions."""
+        with self._cursor() as cursor:
+            yield from map(self._row_to_question,
+                           self._execute_load(cursor, limit, offset, subject, keywords, shuffle))
 
-            if conditions:
-                query += ' WHERE ' + ' AND '.join(conditions)
+    def load_questions_lite(self, limit: int = 10, offset: int = 0,
+                            subject: Optional[str] = None,
+                            keywords: Optional[List[str]] = None,
+                            shuffle: bool = False) -> List[QuestionSummary]:
+        """Load question summaries for list views, without reading the JSON columns."""
+        with self._cursor() as cursor:
+            rows = self._execute_load(cursor, limit, offset, subject, keywords, shuffle, _SUMMARY_COLS)
+            return [QuestionSummary(*row) for row in rows]
 
-            if shuffle:
-                query += ' ORDER BY RANDOM()'
-            else:
-                query += ' ORDER BY created_at DESC'
+    @classmethod
+    def _execute_load(cls, cursor: sqlite3.Cursor, limit: int, offset: int,
+                      subject: Optional[str], keywords: Optional[List[str]],
+                      shuffle: bool, columns: str = _COLS) -> sqlite3.Cursor:
+        """Run the load_questions query on the cursor, selecting the given columns."""
+        tail = 'ORDER BY RANDOM() LIMIT ? OFFSET ?' if shuffle else 'ORDER BY created_at DESC LIMIT ? OFFSET ?'
+        where, params = cls._build_filter(subject, keywords)
+        params.extend([limit, offset])
 
-            query += ' LIMIT ? OFFSET ?'
-            params.extend([limit, offset])
+        return cursor.execute(_select_questions(where, tail, columns), params)
 
-            cursor.execute(query, params)
-            return [self._row_to_question(row) for row in cursor.fetchall()]
+    def count_questions(self, subject: Optional[str] = None,
+                        keywords: Optional[List[str]] = None) -> int:
+        """Count the questions matching the same filters as load_questions."""
+        where, params = self._build_filter(subject, keywords)
+        with self._cursor() as cursor:
+            return cursor.execute(_select_questions(where, columns = 'COUNT(*)'), params).fetchone()[0]
 
     def get_subjects(self) -> List[str]:
         """Get list of all unique subjects in the database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT DISTINCT subject FROM questions ORDER BY subject')
+        with self._cursor() as cursor:
+            cursor.execute(_SELECT_SUBJECTS)
             return [row[0] for row in cursor.fetchall()]
 
     def get_keywords(self) -> List[str]:
         """Get list of all unique keywords in the database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT keywords FROM questions')
-            keywords_set = set()
-            for row in cursor.fetchall():
-                keywords = json.loads(row[0])
-                keywords_set.update(keywords)
-            return sorted(list(keywords_set))
+        with self._cursor() as cursor:
+            cursor.execute(_SELECT_KEYWORDS)
+            return [row[0] for row in cursor.fetchall()]
 
     def get_stats(self) -> Dict:
         """Get database statistics."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cursor() as cursor:
+            total_questions, total_subjects, latest_question, total_keywords = cursor.execute(
+                    _SELECT_STATS).fetchone()
             stats = {
-                'total_questions':       cursor.execute('SELECT COUNT(*) FROM questions').fetchone()[0],
-                'total_subjects':        cursor.execute('SELECT COUNT(DISTINCT subject) FROM questions').fetchone()[0],
+                'total_questions':       total_questions,
+                'total_subjects':        total_subjects,
                 'questions_per_subject': {},
-                'latest_question':       cursor.execute(
-                    'SELECT created_at FROM questions ORDER BY created_at DESC LIMIT 1').fetchone()[0],
-                'total_keywords':        len(self.get_keywords())
+                'latest_question':       latest_question,
+                'total_keywords':        total_keywords
                 }
 
             # Get questions count per subject
-            cursor.execute('SELECT subject, COUNT(*) FROM questions GROUP BY subject')
+            cursor.execute(_COUNT_PER_SUBJECT)
             stats['questions_per_subject'] = dict(cursor.fetchall())
 
             return stats
 
-    def search_questions(self, query: str) -> List[Question]:
-        """Search questions by text content."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM questions 
-                WHERE question_text LIKE ? 
-                   OR subject LIKE ? 
-                   OR keywords LIKE ?
-                ORDER BY created_at DESC
-            ''', (f'%{query}%', f'%{query}%', f'%{query}%'))
-            return [self._row_to_question(row) for row in cursor.fetchall()]
\ No newline at end of file
+    def search_questions(self, query: str, limit: int = -1) -> List[Question]:
+        """Search questions by text content, best matches first.
+
+        The query is matched as a phrase whose last word may be a prefix,
+        against the question text, subject and keywords. A negative limit
+        returns every match.
+        """
+        if not query.strip():
+            return []
+
+        with self._cursor() as cursor:
+            cursor.execute(_SEARCH, (self._fts_phrase(query) + ' *', limit))
+            return list(map(self._row_to_question, cursor))
\ No newline at end of file